@@ -12,6 +12,7 @@ class Preprocessing:
         self.weatherdata: pd.DataFrame = weather_data
         self.airqualitydata: pd.DataFrame = airquality_data
         self.merged_data: pd.DataFrame | None = None
+        self.dates: pd.Series | None = None
 
 
     def clean_weather_data(self):
@@ -92,7 +93,8 @@ class Preprocessing:
         3. create pm25 column based on wind direction
         4. month, quarter, week of the year
         5. Add cyclical features for month, quarter, and week of the year
-        6. Drop irrelevant columns
+        6. Keep the parsed dates (aligned on the index) for time-ordered backtesting
+        7. Drop irrelevant columns
         '''
 
         logging.info('Feature engineering...')
@@ -133,9 +135,11 @@ class Preprocessing:
         self.merged_data['pm25'] = np.select(CONDITIONS, PM25_VALUES)
 
         # Extract month, quarter, and week of the year from date
-        self.merged_data['month'] = pd.to_datetime(self.merged_data['date'], dayfirst=True).dt.month
-        self.merged_data['quarter'] = pd.to_datetime(self.merged_data['date'], dayfirst=True).dt.quarter
-        self.merged_data['week of the year'] = pd.to_datetime(self.merged_data['date'], dayfirst=True).dt.isocalendar().week
+        # Parse the dates once and keep them for time-ordered backtesting, rows removed later are dropped by aligning on the index
+        self.dates = pd.to_datetime(self.merged_data['date'], dayfirst=True)
+        self.merged_data['month'] = self.dates.dt.month
+        self.merged_data['quarter'] = self.dates.dt.quarter
+        self.merged_data['week of the year'] = self.dates.dt.isocalendar().week
 
         # Add cyclical features for month, quarter, and week of the year
         self.merged_data['month_sin'] = np.sin(2 * np.pi * self.merged_data['month']/12)
@@ -76,4 +76,37 @@ def query_data_from_database(query, db_path, db_name):
 
     db.close()
 
-    return data
\ No newline at end of file
+    return data
+
+class FeatureStore:
+    '''Class to snapshot preprocessed features to a local SQLite database and stream them back in chunks'''
+    def __init__(self, db_dir, db_name, table_name='features'):
+        self.db_dir = db_dir
+        self.table_name = table_name
+        logging.info(f"Initializing feature store in directory: {db_dir} with database name: {db_name}")
+        os.makedirs(self.db_dir, exist_ok=True)
+        self.db_path = os.path.join(self.db_dir, db_name)
+
+        try:
+            self.engine = create_engine('sqlite:///' + self.db_path)
+            logging.info("Feature store engine created successfully.")
+        except Exception as e:
+            logging.error(f"Failed to create feature store engine: {e}")
+            raise SystemExit
+
+    def write(self, df, chunksize=10000):
+        '''Write a DataFrame to the feature store, replacing any existing snapshot'''
+        logging.info(f"Writing {df.shape[0]} rows to feature store table: {self.table_name}")
+        df.to_sql(self.table_name, self.engine, if_exists='replace', index=False, chunksize=chunksize)
+
+    def read_chunks(self, chunksize=10000):
+        '''Yield the feature store table as DataFrames of at most `chunksize` rows'''
+        query = f'SELECT * FROM "{self.table_name}" ORDER BY rowid'
+        # Use a streaming connection so that SQLite rows are fetched lazily, one chunk at a time
+        with self.engine.connect().execution_options(stream_results=True) as connection:
+            for chunk in pd.read_sql_query(query, connection, chunksize=chunksize):
+                yield chunk
+
+    def close(self):
+        logging.info("Closing feature store connection.")
+        self.engine.dispose()
@@ -5,11 +5,15 @@ import argparse
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), 'features'))
 sys.path.append(os.path.join(os.path.dirname(__file__), 'model'))
-from features.utils import setup_logging, query_data_from_database
+from features.utils import setup_logging, query_data_from_database, FeatureStore
 from features.preprocessing import Preprocessing
 from features.constants import TRAINING_COLUMNS
 from model.config import param_grid_gb, param_grid_rf, param_grid_svc, param_grid_xgb, pca_variance_threshold
+from model.config import streaming_chunksize, streaming_test_size, streaming_epochs, streaming_cache_dir
+from model.config import backtest_window, backtest_n_windows, backtest_test_size, backtest_max_train_size, backtest_warm_start_estimators, backtest_n_jobs, backtest_results_file
 from model.train import ModelTrainer
+from model.stream import StreamingModelTrainer
+from model.backtest import WalkForwardBacktester
 
 # remove warnings
 import warnings
@@ -22,6 +26,9 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Run the end-to-end pipeline with configurable parameters.')
     args = parser.add_argument('--pca', action='store_true', help='Perform PCA on the data before training the models. The number of components can be determined using the PCA variance threshold defined in models/config.py.')
     parser.add_argument('--tune', action='store_true', help='Perform hyperparameter tuning for the models using GridSearchCV. The parameters can be configured in models/config.py.')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--backtest', action='store_true', help='Run a walk-forward backtest of the models over the date-ordered data instead of a random train/test split. The windows can be configured in models/config.py. Cannot be combined with --stream.')
+    mode.add_argument('--stream', action='store_true', help='Train out-of-core by streaming the preprocessed features from a SQLite feature store in chunks. The chunk size can be configured in models/config.py. Cannot be combined with --backtest.')
     args = parser.parse_args()
     
     setup_logging()
@@ -50,30 +57,58 @@ if __name__ == "__main__":
         preprocessing.normalize_data(TRAINING_COLUMNS['NUMERICAL'])
         preprocessing.encode_ordinal_columns(TRAINING_COLUMNS['ORDINAL'])
 
-        # Model Training and Evaluation
-        logging.info('Model Training...')
-        modeltrainer = ModelTrainer(preprocessing.merged_data)
-        logging.info(f'''Columns: {list(modeltrainer.X.columns)}''')
-
-        # Perform PCA
-        if args.pca:
-            logging.info('Performing PCA...')
-            n_components = modeltrainer.determine_pca_components(variance_threshold=pca_variance_threshold)
-            modeltrainer.perform_pca(n_components)
-
-        svm = modeltrainer.train_svm()  
-        rf = modeltrainer.train_random_forest()
-        gb = modeltrainer.train_gradient_boosting()
-        xgb = modeltrainer.train_xgboost()
-
-
-        # Hyperparameter Tuning
-        if args.tune:
-            logging.info('Hyperparameter Tuning...')
-            modeltrainer.hyperparameter_tuning(svm, param_grid_svc )
-            modeltrainer.hyperparameter_tuning(rf, param_grid_rf)
-            modeltrainer.hyperparameter_tuning(gb, param_grid_gb)
-            modeltrainer.hyperparameter_tuning(xgb, param_grid_xgb)
+        # Out-of-core Model Training and Evaluation
+        if args.stream:
+            logging.info('Model Training (out-of-core)...')
+            if args.pca or args.tune:
+                logging.warning('--pca and --tune are not supported with --stream and will be ignored.')
+            feature_store = FeatureStore(db_dir, 'features.db')
+            feature_store.write(preprocessing.merged_data, chunksize=streaming_chunksize)
+            # Release the in-memory data so that training and evaluation only hold one chunk at a time
+            del weather_df, airquality_df, preprocessing
+            streamtrainer = StreamingModelTrainer(feature_store, chunksize=streaming_chunksize, test_size=streaming_test_size,
+                                                  epochs=streaming_epochs, cache_dir=os.path.join(db_dir, streaming_cache_dir))
+            streamtrainer.train_sgd()
+            streamtrainer.train_passive_aggressive()
+            streamtrainer.train_xgboost()
+            feature_store.close()
+
+        # Walk-forward Backtesting
+        elif args.backtest:
+            logging.info('Walk-forward Backtesting...')
+            if args.pca or args.tune:
+                logging.warning('--pca and --tune are not supported with --backtest and will be ignored.')
+            backtester = WalkForwardBacktester(preprocessing.merged_data, preprocessing.dates, n_windows=backtest_n_windows, window=backtest_window,
+                                               test_size=backtest_test_size, max_train_size=backtest_max_train_size,
+                                               n_estimators_step=backtest_warm_start_estimators, n_jobs=backtest_n_jobs)
+            backtester.run()
+            backtester.save_results(os.path.join(db_dir, backtest_results_file))
+
+        else:
+            # Model Training and Evaluation
+            logging.info('Model Training...')
+            modeltrainer = ModelTrainer(preprocessing.merged_data)
+            logging.info(f'''Columns: {list(modeltrainer.X.columns)}''')
+
+            # Perform PCA
+            if args.pca:
+                logging.info('Performing PCA...')
+                n_components = modeltrainer.determine_pca_components(variance_threshold=pca_variance_threshold)
+                modeltrainer.perform_pca(n_components)
+
+            svm = modeltrainer.train_svm()  
+            rf = modeltrainer.train_random_forest()
+            gb = modeltrainer.train_gradient_boosting()
+            xgb = modeltrainer.train_xgboost()
+
+
+            # Hyperparameter Tuning
+            if args.tune:
+                logging.info('Hyperparameter Tuning...')
+                modeltrainer.hyperparameter_tuning(svm, param_grid_svc )
+                modeltrainer.hyperparameter_tuning(rf, param_grid_rf)
+                modeltrainer.hyperparameter_tuning(gb, param_grid_gb)
+                modeltrainer.hyperparameter_tuning(xgb, param_grid_xgb)
 
 
     except Exception as e:
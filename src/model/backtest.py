@@ -0,0 +1,216 @@
+'''Walk-forward backtesting over the date-ordered merged data'''
+
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.base import clone
+from sklearn.preprocessing import StandardScaler, LabelEncoder
+from xgboost import XGBClassifier
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.svm import SVC
+from sklearn.ensemble import RandomForestClassifier
+from joblib import Parallel, delayed
+from features.constants import TRAINING_COLUMNS
+from config import MODEL_PARAMETERS
+import pandas as pd
+import numpy as np
+import logging
+import time
+import warnings
+warnings.filterwarnings("ignore")
+
+# Models that can continue training from the previous window instead of refitting from scratch
+WARM_START_MODELS = ['RandomForestClassifier', 'GradientBoostingClassifier', 'XGBClassifier']
+
+
+def build_models():
+    '''Build the configured models from MODEL_PARAMETERS'''
+    return {
+        'SVC': SVC(**MODEL_PARAMETERS['SVC']),
+        'RandomForestClassifier': RandomForestClassifier(**MODEL_PARAMETERS['RandomForestClassifier']),
+        'GradientBoostingClassifier': GradientBoostingClassifier(**MODEL_PARAMETERS['GradientBoostingClassifier']),
+        'XGBClassifier': XGBClassifier(**MODEL_PARAMETERS['XGBClassifier']),
+    }
+
+
+def build_window(X, y, train_index, test_index, scaled_columns):
+    '''Build the feature matrices of one window, standardizing with statistics from its training rows only'''
+    X_train, X_test = X[train_index].copy(), X[test_index].copy()
+    scaler = StandardScaler().fit(X_train[:, scaled_columns])
+    X_train[:, scaled_columns] = scaler.transform(X_train[:, scaled_columns])
+    X_test[:, scaled_columns] = scaler.transform(X_test[:, scaled_columns])
+    return X_train, y[train_index], X_test, y[test_index]
+
+
+def fit_model(model_name, model, X_train, y_train, **fit_params):
+    '''Fit a model, encoding the labels for XGBoost which requires classes 0..n-1 even when a window lacks one'''
+    if model_name == 'XGBClassifier':
+        encoder = LabelEncoder().fit(y_train)
+        model.fit(X_train, encoder.transform(y_train), **fit_params)
+        return encoder
+    model.fit(X_train, y_train, **fit_params)
+    return None
+
+
+def score_window(model_name, window, model, X_test, y_test, fit_seconds, warm_started, encoder=None):
+    '''Score a fitted model on a test window and return one row of the results table'''
+    predictions = model.predict(X_test)
+    if encoder is not None:
+        predictions = encoder.inverse_transform(predictions)
+    return {
+        'window': window,
+        'model': model_name,
+        'warm_start': warm_started,
+        'fit_seconds': fit_seconds,
+        'accuracy': accuracy_score(y_test, predictions),
+        'precision': precision_score(y_test, predictions, average='weighted'),
+        'recall': recall_score(y_test, predictions, average='weighted'),
+        'f1': f1_score(y_test, predictions, average='weighted'),
+    }
+
+
+def skip_window(model_name, window):
+    '''Record a window whose training rows hold a single class, which no configured model can fit'''
+    logging.warning(f'Skipping window {window} for {model_name}: training rows hold a single class.')
+    return {
+        'window': window,
+        'model': model_name,
+        'warm_start': False,
+        'fit_seconds': np.nan,
+        'accuracy': np.nan,
+        'precision': np.nan,
+        'recall': np.nan,
+        'f1': np.nan,
+    }
+
+
+def run_window(model_name, model, window, window_data):
+    '''Fit a fresh copy of the model on a single window'''
+    X_train, y_train, X_test, y_test = window_data
+    if len(np.unique(y_train)) < 2:
+        return [skip_window(model_name, window)]
+
+    model = clone(model)
+    start = time.perf_counter()
+    encoder = fit_model(model_name, model, X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    return [score_window(model_name, window, model, X_test, y_test, fit_seconds, False, encoder)]
+
+
+def run_warm_start_chain(model_name, model, windows, n_estimators_step):
+    '''Fit the model window by window, continuing from the previous window's fit where the classes agree'''
+    results = []
+    previous = None
+    previous_classes = None
+    for window, (X_train, y_train, X_test, y_test) in enumerate(windows):
+        classes = np.unique(y_train)
+        if len(classes) < 2:
+            results.append(skip_window(model_name, window))
+            continue
+        warm_started = previous is not None and np.array_equal(classes, previous_classes)
+
+        start = time.perf_counter()
+        if not warm_started:
+            current = clone(model)
+            if model_name != 'XGBClassifier':
+                current.set_params(warm_start=True)
+            encoder = fit_model(model_name, current, X_train, y_train)
+        elif model_name == 'XGBClassifier':
+            # Continued boosting: add rounds on top of the previous window's booster. The class set is
+            # unchanged, so the label encoding matches the one the booster was trained with
+            current = clone(model).set_params(n_estimators=n_estimators_step)
+            encoder = fit_model(model_name, current, X_train, y_train, xgb_model=previous.get_booster())
+        else:
+            # warm_start: keep the fitted trees/stages and only fit the additional ones
+            current = previous
+            current.set_params(n_estimators=current.n_estimators + n_estimators_step)
+            encoder = fit_model(model_name, current, X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        results.append(score_window(model_name, window, current, X_test, y_test, fit_seconds, warm_started, encoder))
+        previous = current
+        previous_classes = classes
+
+    return results
+
+
+class WalkForwardBacktester():
+    def __init__(self, data, dates, n_windows=5, window='expanding', test_size=None, max_train_size=None,
+                 n_estimators_step=20, n_jobs=-1):
+        if window not in ('expanding', 'sliding'):
+            raise ValueError(f"window must be 'expanding' or 'sliding', got {window!r}")
+
+        self.window = window
+        self.n_estimators_step = n_estimators_step
+        self.n_jobs = n_jobs
+        self.models = build_models()
+        self.results = None
+
+        # Order the rows by date once; every window is a contiguous slice of these arrays
+        dates = dates.loc[data.index]
+        order = np.argsort(dates.to_numpy(), kind='stable')
+        data = data.iloc[order]
+        self.dates = dates.iloc[order].reset_index(drop=True)
+        features = data.drop(columns=TRAINING_COLUMNS['TARGET'])
+        X = features.to_numpy(dtype=np.float64)
+        y = data[TRAINING_COLUMNS['TARGET']].to_numpy()
+
+        splitter = TimeSeriesSplit(n_splits=n_windows, test_size=test_size,
+                                   max_train_size=max_train_size if window == 'sliding' else None)
+        self.windows = [(slice(train_index[0], train_index[-1] + 1), slice(test_index[0], test_index[-1] + 1))
+                        for train_index, test_index in splitter.split(X)]
+
+        # Cache the feature matrices of every window once, re-standardized on the training rows only so the
+        # test period does not leak into the scaling. Every model then reuses the same cached matrices
+        scaled_columns = [features.columns.get_loc(column) for column in TRAINING_COLUMNS['NUMERICAL'] if column in features.columns]
+        self.window_data = [build_window(X, y, train_index, test_index, scaled_columns)
+                            for train_index, test_index in self.windows]
+        logging.info(f"WalkForwardBacktester initialized with {len(self.windows)} {window} windows.")
+
+    def run(self):
+        '''Evaluate every model on every window and collect the per-window metrics'''
+        logging.info('Running walk-forward backtest...')
+        tasks = []
+        for model_name, model in self.models.items():
+            # Warm-starting makes each window depend on the previous one, so with expanding windows the
+            # warm-start models give up per-window parallelism and run as one sequential chain per model
+            # (in parallel with the other tasks); all other model/window pairs run in parallel per window
+            if self.window == 'expanding' and model_name in WARM_START_MODELS:
+                tasks.append(delayed(run_warm_start_chain)(model_name, model, self.window_data, self.n_estimators_step))
+            else:
+                for window, window_data in enumerate(self.window_data):
+                    tasks.append(delayed(run_window)(model_name, model, window, window_data))
+
+        rows = [row for task_rows in Parallel(n_jobs=self.n_jobs)(tasks) for row in task_rows]
+        self.results = self.build_results(rows)
+
+        summary = self.results.groupby('model', observed=True)[['accuracy', 'precision', 'recall', 'f1']].mean()
+        logging.info(f'Mean metrics across windows:\n{summary.round(4)}')
+
+        return self.results
+
+    def build_results(self, rows):
+        '''Build a compact results table with the date range of each window'''
+        results = pd.DataFrame(rows)
+        bounds = pd.DataFrame([{
+            'window': window,
+            'train_start': self.dates.iloc[train_index.start],
+            'train_end': self.dates.iloc[train_index.stop - 1],
+            'test_start': self.dates.iloc[test_index.start],
+            'test_end': self.dates.iloc[test_index.stop - 1],
+            'n_train': train_index.stop - train_index.start,
+            'n_test': test_index.stop - test_index.start,
+        } for window, (train_index, test_index) in enumerate(self.windows)])
+        results = results.merge(bounds, on='window').sort_values(['window', 'model'], ignore_index=True)
+
+        results['model'] = results['model'].astype('category')
+        results[['window', 'n_train', 'n_test']] = results[['window', 'n_train', 'n_test']].astype(np.int32)
+        metric_columns = ['fit_seconds', 'accuracy', 'precision', 'recall', 'f1']
+        results[metric_columns] = results[metric_columns].astype(np.float32)
+
+        return results[['window', 'model', 'train_start', 'train_end', 'test_start', 'test_end', 'n_train', 'n_test',
+                        'warm_start', 'fit_seconds', 'accuracy', 'precision', 'recall', 'f1']]
+
+    def save_results(self, path):
+        '''Write the results table to a CSV file'''
+        self.results.to_csv(path, index=False, float_format='%.4f', date_format='%Y-%m-%d')
+        logging.info(f'Saved backtest results to {path}')
@@ -30,8 +30,39 @@ MODEL_PARAMETERS = {
         'colsample_bytree': 0.8,
     },
 
+    # Incremental learners used by the out-of-core (--stream) training path
+    'SGDClassifier': {
+        'loss': 'log_loss',
+        'alpha': 0.0001,
+        'random_state': 42,
+    },
+
+    # PassiveAggressiveClassifier is deprecated in scikit-learn, this is its SGDClassifier equivalent
+    'PassiveAggressive': {
+        'loss': 'hinge',
+        'penalty': None,
+        'learning_rate': 'pa1',
+        'eta0': 1.0,
+        'random_state': 42,
+    },
+
 }
 
+#### Out-of-core Training ####
+streaming_chunksize = 5000  # Number of rows held in memory at any one time
+streaming_test_size = 0.2  # Fraction of rows assigned to the test split by the hash-based splitter
+streaming_epochs = 5  # Number of passes over the training chunks for the partial_fit learners
+streaming_cache_dir = 'cache'  # Directory (relative to src/data) for XGBoost external-memory cache files, removed after training
+
+#### Walk-forward Backtesting ####
+backtest_window = 'expanding'  # 'expanding' keeps all past rows, 'sliding' keeps the most recent backtest_max_train_size rows
+backtest_n_windows = 5  # Number of walk-forward windows
+backtest_test_size = None  # Rows per test window, None splits the data evenly across windows
+backtest_max_train_size = 365  # Rows per training window when backtest_window is 'sliding'
+backtest_warm_start_estimators = 20  # Trees/boosting rounds added per window when warm-starting
+backtest_n_jobs = -1  # Number of parallel workers, -1 uses all processors
+backtest_results_file = 'backtest_results.csv'  # Results table written to src/data
+
 #### PCA Variance Threshold ####
 pca_variance_threshold = 0.95
 
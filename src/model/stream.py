@@ -0,0 +1,172 @@
+'''Out-of-core training: streams preprocessed features from the feature store in chunks'''
+
+from sklearn.linear_model import SGDClassifier
+import xgboost as xgb
+import pandas as pd
+import numpy as np
+import logging
+import os
+import tempfile
+from features.constants import TRAINING_COLUMNS
+from config import MODEL_PARAMETERS
+import warnings
+warnings.filterwarnings("ignore")
+
+# Resolution of the stratified splitter, i.e. test_size is honoured to 1/SPLIT_RESOLUTION
+SPLIT_RESOLUTION = 10000
+
+
+class ChunkIterator(xgb.DataIter):
+    '''XGBoost external-memory iterator over one split of the feature store'''
+    def __init__(self, trainer, split, cache_prefix):
+        self.trainer = trainer
+        self.split = split
+        self.chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self.chunks is None:
+            self.chunks = self.trainer.split_chunks(self.split)
+        try:
+            X, y = next(self.chunks)
+        except StopIteration:
+            return 0
+        input_data(data=X, label=y)
+        return 1
+
+    def reset(self):
+        if self.chunks is not None:
+            self.chunks.close()
+        self.chunks = None
+
+
+class StreamingModelTrainer():
+    def __init__(self, feature_store, chunksize=5000, test_size=0.2, epochs=1, cache_dir=None):
+        self.feature_store = feature_store
+        self.chunksize = chunksize
+        self.test_size = test_size
+        self.epochs = epochs
+        self.cache_dir = cache_dir or os.path.join(feature_store.db_dir, 'cache')
+        self.models = {}
+        self.model_metrics = {}
+        target = TRAINING_COLUMNS['TARGET']
+        self.classes = np.arange(len(TRAINING_COLUMNS['ORDINAL'][target]))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        logging.info(f"StreamingModelTrainer initialized with chunksize {chunksize}.")
+
+    def test_mask(self, X, y, class_counts):
+        '''Deterministic stratified split: within a chunk, the rows of each class are ordered by a hash
+        of their feature values and a per-class running counter sends every (1 / test_size)-th row to
+        the test split, so each class is split at test_size (to within one row) given the row order'''
+        hashes = pd.util.hash_pandas_object(X, index=False).to_numpy()
+        labels = y.to_numpy()
+        test_rows = int(round(self.test_size * SPLIT_RESOLUTION))
+        mask = np.zeros(len(labels), dtype=bool)
+        for label in np.unique(labels):
+            positions = np.flatnonzero(labels == label)
+            positions = positions[np.argsort(hashes[positions], kind='stable')]
+            seen = class_counts.get(label, 0) + np.arange(1, len(positions) + 1)
+            mask[positions] = (seen * test_rows) // SPLIT_RESOLUTION > ((seen - 1) * test_rows) // SPLIT_RESOLUTION
+            class_counts[label] = seen[-1]
+        return mask
+
+    def split_chunks(self, split):
+        '''Yield (X, y) chunks belonging to the `train` or `test` split'''
+        class_counts = {}
+        for chunk in self.feature_store.read_chunks(self.chunksize):
+            X = chunk.drop(columns=TRAINING_COLUMNS['TARGET'])
+            y = chunk[TRAINING_COLUMNS['TARGET']]
+            mask = self.test_mask(X, y, class_counts)
+            if split == 'train':
+                mask = ~mask
+            if mask.any():
+                yield X[mask], y[mask]
+
+    def evaluate_model(self, model_name, predict):
+        '''Evaluate a model by streaming the test split and accumulating a confusion matrix'''
+        n_classes = len(self.classes)
+        confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+        for X, y in self.split_chunks('test'):
+            predictions = np.asarray(predict(X), dtype=np.int64)
+            np.add.at(confusion, (y.to_numpy(dtype=np.int64), predictions), 1)
+
+        # Weighted metrics computed from the confusion matrix, matching sklearn's average='weighted'
+        support = confusion.sum(axis=1)
+        true_positives = np.diag(confusion)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            class_precision = np.nan_to_num(true_positives / confusion.sum(axis=0))
+            class_recall = np.nan_to_num(true_positives / support)
+            class_f1 = np.nan_to_num(2 * class_precision * class_recall / (class_precision + class_recall))
+        weights = support / max(support.sum(), 1)
+        accuracy = true_positives.sum() / max(confusion.sum(), 1)
+        precision = float(np.dot(weights, class_precision))
+        recall = float(np.dot(weights, class_recall))
+        f1 = float(np.dot(weights, class_f1))
+
+        logging.info(f'''
+        {model_name.center(30, '-')}
+        Accuracy\t: {accuracy:.4f}
+        Precision\t: {precision:.4f}
+        Recall\t\t: {recall:.4f}
+        F1 Score\t: {f1:.4f}
+        {''.center(30, '-')}''')
+
+        self.model_metrics[model_name] = {
+            'accuracy': accuracy,
+            'precision': precision,
+            'recall': recall,
+            'f1': f1
+        }
+
+    def train_incremental(self, model, model_name):
+        '''Train a partial_fit classifier over the streamed training split'''
+        logging.info(f'Training {model_name} out-of-core...')
+        for epoch in range(self.epochs):
+            for X, y in self.split_chunks('train'):
+                model.partial_fit(X, y, classes=self.classes)
+            logging.info(f'Completed epoch {epoch + 1}/{self.epochs}')
+
+        self.evaluate_model(model_name, model.predict)
+        self.models[model_name] = model
+
+        return model
+
+    def train_sgd(self):
+        '''Train SGDClassifier model'''
+        model = SGDClassifier(**MODEL_PARAMETERS['SGDClassifier'])
+        return self.train_incremental(model, 'SGDClassifier')
+
+    def train_passive_aggressive(self):
+        '''Train a Passive Aggressive model (SGDClassifier with the PA-I learning rate)'''
+        model = SGDClassifier(**MODEL_PARAMETERS['PassiveAggressive'])
+        return self.train_incremental(model, 'PassiveAggressive')
+
+    def train_xgboost(self):
+        '''Train XGBoost using the external-memory DataIter interface
+
+        Only the feature pages are kept on disk. XGBoost still holds the labels, gradients, prediction
+        cache and row partitions of every training row in memory, so unlike the partial_fit learners its
+        memory grows with the number of training rows (and with max_depth), not just with the chunk size'''
+        logging.info('Training XGBClassifier out-of-core...')
+        params = {
+            'objective': 'multi:softprob',
+            'num_class': len(self.classes),
+            'tree_method': 'hist',
+            'learning_rate': MODEL_PARAMETERS['XGBClassifier']['learning_rate'],
+            'max_depth': MODEL_PARAMETERS['XGBClassifier']['max_depth'],
+            'subsample': MODEL_PARAMETERS['XGBClassifier']['subsample'],
+            'colsample_bytree': MODEL_PARAMETERS['XGBClassifier']['colsample_bytree'],
+        }
+        n_estimators = MODEL_PARAMETERS['XGBClassifier']['n_estimators']
+
+        # The cache pages are only needed while training, so keep them in a directory removed afterwards
+        with tempfile.TemporaryDirectory(dir=self.cache_dir) as cache_dir:
+            iterator = ChunkIterator(self, 'train', os.path.join(cache_dir, 'xgb_train'))
+            dtrain = xgb.DMatrix(iterator)
+            booster = xgb.train(params, dtrain, num_boost_round=n_estimators)
+            del dtrain, iterator
+
+        self.evaluate_model('XGBClassifier', lambda X: booster.predict(xgb.DMatrix(X)).argmax(axis=1))
+        self.models['XGBClassifier'] = booster
+
+        return booster
@@ -0,0 +1,70 @@
+'''Tests for the walk-forward backtesting engine'''
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'model'))
+from features.constants import TRAINING_COLUMNS
+from model.backtest import WalkForwardBacktester
+from config import MODEL_PARAMETERS
+
+N_ROWS = 600
+
+
+def make_data(n_rows, seed=42):
+    '''Synthetic merged data where no "Medium" (1) labels fall in the first 150 days'''
+    rng = np.random.default_rng(seed)
+    features = TRAINING_COLUMNS['NUMERICAL']
+    data = pd.DataFrame(rng.normal(50, 10, (n_rows, len(features))), columns=features)
+    target = np.where(data[features[0]] > 50, 2, 0)
+    target[150:][rng.random(n_rows - 150) < 0.3] = 1
+    data[TRAINING_COLUMNS['TARGET']] = target
+    dates = pd.Series(pd.date_range('2020-01-01', periods=n_rows, freq='D'), index=data.index)
+    # Shuffle the rows so the backtester has to order them by date
+    order = rng.permutation(n_rows)
+    return data.iloc[order], dates.iloc[order]
+
+
+@pytest.fixture(autouse=True)
+def small_models(monkeypatch):
+    for model_name in ['RandomForestClassifier', 'GradientBoostingClassifier', 'XGBClassifier']:
+        monkeypatch.setitem(MODEL_PARAMETERS[model_name], 'n_estimators', 10)
+
+
+@pytest.mark.parametrize('window', ['expanding', 'sliding'])
+def test_backtest_handles_windows_missing_a_class(window):
+    data, dates = make_data(N_ROWS)
+    backtester = WalkForwardBacktester(data, dates, n_windows=5, window=window, max_train_size=100, n_jobs=1)
+    results = backtester.run()
+
+    assert len(results) == 5 * len(backtester.models)
+    assert results['f1'].notna().all()
+    assert (results['train_end'] < results['test_start']).all()
+    if window == 'expanding':
+        warm = results[results['model'] == 'XGBClassifier'].sort_values('window')['warm_start'].tolist()
+        # The first window lacks class 1, so the second window must refit from scratch
+        assert warm == [False, False, True, True, True]
+
+
+def test_window_scaling_uses_training_rows_only():
+    data, dates = make_data(N_ROWS)
+    backtester = WalkForwardBacktester(data, dates, n_windows=5, n_jobs=1)
+    for X_train, _, X_test, _ in backtester.window_data:
+        np.testing.assert_allclose(X_train.mean(axis=0), 0, atol=1e-9)
+        np.testing.assert_allclose(X_train.std(axis=0), 1, atol=1e-9)
+        assert not np.allclose(X_test.mean(axis=0), 0, atol=1e-9)
+
+
+def test_parallel_run_matches_sequential_run(monkeypatch):
+    for model_name in ['RandomForestClassifier', 'GradientBoostingClassifier', 'XGBClassifier']:
+        monkeypatch.setitem(MODEL_PARAMETERS[model_name], 'random_state', 42)
+    data, dates = make_data(N_ROWS)
+
+    results = {}
+    for n_jobs in [1, 2]:
+        backtester = WalkForwardBacktester(data, dates, n_windows=5, n_jobs=n_jobs)
+        results[n_jobs] = backtester.run().drop(columns='fit_seconds')
+
+    pd.testing.assert_frame_equal(results[1], results[2])
@@ -0,0 +1,129 @@
+'''Tests for the out-of-core training path'''
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.append(SRC_DIR)
+sys.path.append(os.path.join(SRC_DIR, 'model'))
+from features.utils import FeatureStore
+from features.constants import TRAINING_COLUMNS
+from model.stream import StreamingModelTrainer
+from config import MODEL_PARAMETERS
+
+# Memory cap for training the partial_fit learners. The larger feature table is about 3.5x the cap
+MEMORY_CAP_BYTES = 32 * 1024 ** 2
+CHUNKSIZE = 5000
+N_ROWS = 250_000
+SCALE = 4
+
+# Trains in a fresh interpreter and reports the growth of its peak RSS (VmHWM), which also covers
+# native allocations from SQLite and the learners that tracemalloc cannot see. The peak left behind by
+# the imports is reset first (Linux clear_refs) so the growth is measured from the current RSS
+TRAIN_SCRIPT = '''
+import json, os, sys
+sys.path.append(sys.argv[1])
+sys.path.append(os.path.join(sys.argv[1], 'model'))
+from features.utils import FeatureStore
+from model.stream import StreamingModelTrainer
+trainer = StreamingModelTrainer(FeatureStore(sys.argv[2], 'features.db'), chunksize=int(sys.argv[3]), epochs=1)
+def peak_rss():
+    with open('/proc/self/status') as status:
+        return next(int(line.split()[1]) * 1024 for line in status if line.startswith('VmHWM'))
+with open('/proc/self/clear_refs', 'w') as clear_refs:
+    clear_refs.write('5')
+baseline = peak_rss()
+trainer.train_sgd()
+trainer.train_passive_aggressive()
+growth = peak_rss() - baseline
+print(json.dumps({'growth': growth, 'metrics': trainer.model_metrics}))
+'''
+
+
+def make_features(n_rows, seed=42):
+    '''Synthetic preprocessed feature table with an ordinal-encoded target'''
+    rng = np.random.default_rng(seed)
+    features = TRAINING_COLUMNS['NUMERICAL']
+    X = rng.standard_normal((n_rows, len(features)))
+    score = X @ np.linspace(-1, 1, len(features)) + 0.5 * rng.standard_normal(n_rows)
+    data = pd.DataFrame(X, columns=features)
+    data[TRAINING_COLUMNS['TARGET']] = np.digitize(score, np.quantile(score, [0.3, 0.7]))
+    return data
+
+
+def write_store(db_dir, n_rows):
+    data = make_features(n_rows)
+    store = FeatureStore(str(db_dir), 'features.db')
+    store.write(data, chunksize=CHUNKSIZE)
+    return store, data.memory_usage(index=False).sum()
+
+
+def train_in_subprocess(db_dir):
+    output = subprocess.run([sys.executable, '-c', TRAIN_SCRIPT, SRC_DIR, str(db_dir), str(CHUNKSIZE)],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+@pytest.fixture
+def feature_store(tmp_path):
+    store, _ = write_store(tmp_path, 50_000)
+    yield store
+    store.close()
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/clear_refs'), reason='needs Linux to reset the peak RSS')
+def test_incremental_training_memory_is_bounded_by_chunksize(tmp_path):
+    runs = {}
+    for n_rows in [N_ROWS, SCALE * N_ROWS]:
+        store, table_bytes = write_store(tmp_path / str(n_rows), n_rows)
+        store.close()
+        runs[n_rows] = train_in_subprocess(tmp_path / str(n_rows))
+        runs[n_rows]['table_bytes'] = table_bytes
+
+    small, large = runs[N_ROWS], runs[SCALE * N_ROWS]
+    assert large['table_bytes'] > 3 * MEMORY_CAP_BYTES
+    assert large['growth'] < MEMORY_CAP_BYTES
+    # Memory must not scale with the dataset: 4x the rows may only cost allocator noise
+    assert large['growth'] - small['growth'] < MEMORY_CAP_BYTES / 4
+    for model_name in ['SGDClassifier', 'PassiveAggressive']:
+        assert set(large['metrics'][model_name]) == {'accuracy', 'precision', 'recall', 'f1'}
+        assert large['metrics'][model_name]['accuracy'] > 0.5
+
+
+def test_xgboost_trains_from_external_memory(feature_store, tmp_path, monkeypatch):
+    # Fewer, shallower trees keep the test fast
+    monkeypatch.setitem(MODEL_PARAMETERS['XGBClassifier'], 'n_estimators', 10)
+    monkeypatch.setitem(MODEL_PARAMETERS['XGBClassifier'], 'max_depth', 4)
+    monkeypatch.setitem(MODEL_PARAMETERS['XGBClassifier'], 'learning_rate', 0.3)
+    cache_dir = tmp_path / 'cache'
+    trainer = StreamingModelTrainer(feature_store, chunksize=CHUNKSIZE, cache_dir=str(cache_dir))
+    trainer.train_xgboost()
+
+    metrics = trainer.model_metrics['XGBClassifier']
+    assert set(metrics) == {'accuracy', 'precision', 'recall', 'f1'}
+    assert metrics['accuracy'] > 0.5
+    # The external-memory cache pages are removed after training
+    assert os.listdir(cache_dir) == []
+
+
+def test_split_is_stratified(feature_store):
+    trainer = StreamingModelTrainer(feature_store, chunksize=CHUNKSIZE, test_size=0.2)
+    target = TRAINING_COLUMNS['TARGET']
+    counts = {'train': pd.Series(dtype=np.int64), 'test': pd.Series(dtype=np.int64)}
+    for split in counts:
+        for _, y in trainer.split_chunks(split):
+            counts[split] = counts[split].add(y.value_counts(), fill_value=0)
+
+    test_rate = counts['test'] / (counts['train'] + counts['test'])
+    assert len(test_rate) == len(TRAINING_COLUMNS['ORDINAL'][target])
+    # The per-class running counter carries over chunks, so each class is off by at most one row
+    totals = counts['train'] + counts['test']
+    assert ((test_rate - 0.2).abs() <= 1 / totals).all()
+
+    # The split is deterministic across passes
+    first = [X.index.tolist() for X, _ in trainer.split_chunks('test')]
+    second = [X.index.tolist() for X, _ in trainer.split_chunks('test')]
+    assert first == second